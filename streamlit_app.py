@@ -1,159 +1,407 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import requests
 import streamlit as st
 import yfinance as yf
 import pandas as pd
+from requests.adapters import HTTPAdapter
 
 st.set_page_config(page_title="STRAT Scanner", layout="wide")
 
+# =====================================================
+# SHARED HTTP SESSION (keep-alive + connection pool)
+# =====================================================
+@st.cache_resource
+def get_session():
+    """One requests.Session for all yfinance calls so TCP/TLS handshakes
+    are paid once per host instead of once per download.
+
+    If requests_cache is installed, responses are also persisted to a
+    local sqlite file so identical downloads survive Streamlit restarts.
+    """
+    try:
+        import requests_cache
+        session = requests_cache.CachedSession(
+            ".yf_cache",
+            backend="sqlite",
+            expire_after=3600,
+            allowable_codes=(200,),
+            stale_if_error=True,
+            # Revalidate expired entries with ETag/If-Modified-Since so
+            # an unchanged constituents CSV costs a 304, not a re-download
+            cache_control=True,
+        )
+    except ImportError:
+        session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=3)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+SESSION = get_session()
+
+# Keep yfinance's exchange-timezone lookups in a local cache too, so
+# they survive restarts alongside the response cache
+try:
+    yf.set_tz_cache_location(".yf_tz")
+except Exception:
+    pass
+
 # =====================================================
 # LOAD TICKERS (FIXED URL)
 # =====================================================
-@st.cache_data(ttl=86400)
-def load_tickers():
-    tickers = set()
-    
+SP500_URL = "https://raw.githubusercontent.com/datasets/s-and-p-500-companies/master/data/constituents.csv"
+SNAPSHOT_PATH = Path(__file__).with_name("tickers_snapshot.csv")
+SNAPSHOT_MAX_AGE = 7 * 86400  # refetch constituents at most weekly
+
+def load_sp500_symbols():
+    """
+    S&P 500 constituents, preferring a local snapshot over the network.
+    A successful fetch rewrites the snapshot, so after the first cold
+    start the CSV round-trip is skipped until the snapshot goes stale.
+    """
+    try:
+        if SNAPSHOT_PATH.exists() and time.time() - SNAPSHOT_PATH.stat().st_mtime < SNAPSHOT_MAX_AGE:
+            return pd.read_csv(SNAPSHOT_PATH, usecols=["Symbol"], dtype=str)["Symbol"].dropna().tolist()
+    except Exception:
+        pass
+
     try:
-        sp500_url = "https://raw.githubusercontent.com/datasets/s-and-p-500-companies/master/data/constituents.csv"
-        sp500_df = pd.read_csv(sp500_url)
-        tickers.update(sp500_df["Symbol"].dropna().tolist())
+        # Stream the response body straight into the parser and only
+        # materialize the Symbol column, not the whole constituents table
+        with SESSION.get(SP500_URL, stream=True, timeout=30) as resp:
+            resp.raise_for_status()
+            resp.raw.decode_content = True
+            symbols = pd.read_csv(resp.raw, usecols=["Symbol"], dtype=str)["Symbol"].dropna()
+        try:
+            symbols.to_frame().to_csv(SNAPSHOT_PATH, index=False)
+        except OSError:
+            pass
+        return symbols.tolist()
     except Exception as e:
         st.warning(f"S&P 500 load failed: {e}")
-    
+
+    # A stale snapshot still beats an empty universe
+    try:
+        if SNAPSHOT_PATH.exists():
+            return pd.read_csv(SNAPSHOT_PATH, usecols=["Symbol"], dtype=str)["Symbol"].dropna().tolist()
+    except Exception:
+        pass
+    return []
+
+@st.cache_data(ttl=86400)
+def load_tickers():
+    tickers = set()
+
+    tickers.update(load_sp500_symbols())
+
     etfs = ["SPY", "QQQ", "IWM", "XLF", "XLK", "XLE", "XLV", "TLT", "GLD", "VXX", "SQQQ", "TQQQ"]
     tickers.update(etfs)
     
     indexes = ["^GSPC", "^NDX", "^DJI", "^RUT", "^VIX"]
     tickers.update(indexes)
-    
-    return sorted(tickers)
+
+    # Sort once here; the cached tuple is reused verbatim on every rerun
+    return tuple(sorted(tickers))
 
 TICKERS = load_tickers()
 
 # =====================================================
-# MULTIINDEX VALUE EXTRACTOR (FIXED)
+# BATCHED DOWNLOAD HELPERS
 # =====================================================
-def get_val(row, col, ticker):
+# Space out fallback requests across workers and back off on failure:
+# a burst of 429s plus yfinance's own retries costs far more wall time
+# than a few milliseconds of politeness per request
+_MIN_REQUEST_GAP = 0.05
+_rate_lock = threading.Lock()
+_last_request_at = 0.0
+
+def _throttle():
+    global _last_request_at
+    with _rate_lock:
+        wait = _last_request_at + _MIN_REQUEST_GAP - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request_at = time.monotonic()
+
+def download_batch(tickers, **kwargs):
     """
-    Extract value from row handling MultiIndex columns
-    Format: ('Close', 'QQQ'), ('High', 'QQQ'), etc.
+    Download OHLC data for many tickers in one multi-symbol call.
+    If the batch call blows up (Yahoo hiccup, yfinance regression),
+    fall back to per-ticker downloads on a thread pool and rebuild the
+    same ('TICKER', column) MultiIndex shape.
     """
     try:
-        # MultiIndex format: ('Close', 'TICKER')
-        if isinstance(row.index, pd.MultiIndex):
-            return float(row[(col, ticker)])
-        else:
-            # Flat format (older yfinance)
-            return float(row[col])
-    except (KeyError, ValueError, TypeError) as e:
-        raise e
+        all_data = yf.download(tickers, group_by="ticker", threads=True, session=SESSION, **kwargs)
+        if all_data is not None and not all_data.empty:
+            return all_data
+    except Exception:
+        pass
+
+    def fetch_one(ticker):
+        for attempt in range(3):
+            if attempt:
+                time.sleep(2 ** attempt)
+            _throttle()
+            try:
+                data = yf.download(ticker, session=SESSION, **kwargs)
+                if data is not None and not data.empty:
+                    return data
+            except Exception:
+                continue
+        return pd.DataFrame()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        frames = list(pool.map(fetch_one, tickers))
+
+    valid = {t: f for t, f in zip(tickers, frames) if f is not None and not f.empty}
+    if not valid:
+        return pd.DataFrame()
+
+    # Per-ticker downloads may themselves come back with a
+    # (column, ticker) MultiIndex; flatten before re-keying
+    flat = {}
+    for t, f in valid.items():
+        if isinstance(f.columns, pd.MultiIndex):
+            f = f.droplevel(1, axis=1)
+        flat[t] = f
+    return pd.concat(flat, axis=1)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def download_batch_cached(tickers, period, interval, auto_adjust=False):
+    """In-memory cache layer over download_batch, keyed on
+    (tickers, period, interval): repeat scans within the hour are pure
+    CPU. The sqlite response cache from get_session sits underneath
+    and survives restarts."""
+    return download_batch(
+        tickers,
+        period=period,
+        interval=interval,
+        progress=False,
+        auto_adjust=auto_adjust,
+    )
+
+def get_ticker_frame(all_data, ticker):
+    """
+    Slice one ticker's OHLC frame out of a batched yf.download result.
+    With group_by='ticker' the columns are ('TICKER', 'Open'), etc.;
+    a single-ticker download may come back with flat columns.
+    """
+    if all_data is None or all_data.empty:
+        return pd.DataFrame()
+    if isinstance(all_data.columns, pd.MultiIndex):
+        if ticker not in all_data.columns.get_level_values(0):
+            return pd.DataFrame()
+        return all_data[ticker].dropna(how="any")
+    return all_data.dropna(how="any")
 
 # =====================================================
-# STRAT CANDLE LOGIC (WORKING VERSION)
+# STRAT CANDLE LOGIC (VECTORIZED)
 # =====================================================
-def strat_type(prev, curr, ticker):
-    """Calculate STRAT pattern - WORKING with MultiIndex"""
-    try:
-        # Extract values using helper
-        prev_h = get_val(prev, "High", ticker)
-        prev_l = get_val(prev, "Low", ticker)
-        curr_h = get_val(curr, "High", ticker)
-        curr_l = get_val(curr, "Low", ticker)
-        curr_o = get_val(curr, "Open", ticker)
-        curr_c = get_val(curr, "Close", ticker)
-        
-        candle_color = "Green" if curr_c >= curr_o else "Red"
-        
-        if curr_h < prev_h and curr_l > prev_l:
-            return "1 (Inside)"
-        elif curr_h > prev_h and curr_l < prev_l:
-            return "3 (Outside)"
-        elif curr_h > prev_h:
-            return f"2U {candle_color}"
-        elif curr_l < prev_l:
-            return f"2D {candle_color}"
-        else:
-            return "Undefined"
-            
-    except Exception as e:
-        return f"Error: {str(e)}"
+# Candle labels are compared and filtered on every scan; intern them
+# once so label checks are pointer comparisons, not char-by-char
+LBL_INSIDE = sys.intern("1 (Inside)")
+LBL_OUTSIDE = sys.intern("3 (Outside)")
+LBL_2U_GREEN = sys.intern("2U Green")
+LBL_2U_RED = sys.intern("2U Red")
+LBL_2D_GREEN = sys.intern("2D Green")
+LBL_2D_RED = sys.intern("2D Red")
+LBL_UNDEFINED = sys.intern("Undefined")
+LBL_NA_3M = sys.intern("N/A (3M)")
+
+# OHLC column order used by the candle matrix
+O, H, L, C = 0, 1, 2, 3
+
+# Label lookup for the integer codes produced by the JIT kernel
+STRAT_LABELS = np.array(
+    [LBL_UNDEFINED, LBL_INSIDE, LBL_OUTSIDE, LBL_2U_GREEN, LBL_2U_RED, LBL_2D_GREEN, LBL_2D_RED],
+    dtype=object,
+)
+
+try:
+    from numba import njit, prange
+
+    @njit(cache=True, parallel=True)
+    def _strat_codes(prev_h, prev_l, curr_h, curr_l, curr_o, curr_c):
+        out = np.empty(prev_h.size, np.int8)
+        for i in prange(prev_h.size):
+            if curr_h[i] < prev_h[i] and curr_l[i] > prev_l[i]:
+                out[i] = 1
+            elif curr_h[i] > prev_h[i] and curr_l[i] < prev_l[i]:
+                out[i] = 2
+            elif curr_h[i] > prev_h[i]:
+                out[i] = 3 if curr_c[i] >= curr_o[i] else 4
+            elif curr_l[i] < prev_l[i]:
+                out[i] = 5 if curr_c[i] >= curr_o[i] else 6
+            else:
+                out[i] = 0
+        return out
+
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+def build_candle_matrix(all_data, tickers, n_candles):
+    """
+    Stack the last n_candles OHLC rows of every ticker into one
+    (n_tickers, n_candles, 4) float array (Open/High/Low/Close).
+    Tickers with too little or NaN-holed history are dropped.
+    """
+    kept = []
+    rows = []
+    for ticker in tickers:
+        data = get_ticker_frame(all_data, ticker)
+        try:
+            # float32 is plenty for ordering comparisons on prices and
+            # keeps the whole matrix small enough to stay cache-resident
+            tail = data[["Open", "High", "Low", "Close"]].tail(n_candles).to_numpy(dtype=np.float32)
+        except KeyError:
+            continue
+        # One shape test on the extracted block covers the empty and
+        # too-short cases without a separate len(data) probe
+        if tail.shape[0] < n_candles or np.isnan(tail).any():
+            continue
+        kept.append(ticker)
+        rows.append(tail)
+    if not rows:
+        return [], np.empty((0, n_candles, 4), dtype=np.float32)
+    return kept, np.stack(rows)
+
+def classify_strat(prev_h, prev_l, curr_h, curr_l, curr_o, curr_c):
+    """
+    STRAT classification over aligned OHLC arrays, one label per ticker:
+    1 (Inside) / 3 (Outside) / 2U-2D Green-Red / Undefined.
+    Uses the Numba kernel when available, NumPy masks otherwise.
+    """
+    if HAVE_NUMBA:
+        codes = _strat_codes(
+            np.ascontiguousarray(prev_h), np.ascontiguousarray(prev_l),
+            np.ascontiguousarray(curr_h), np.ascontiguousarray(curr_l),
+            np.ascontiguousarray(curr_o), np.ascontiguousarray(curr_c),
+        )
+        return STRAT_LABELS[codes]
+
+    labels = np.full(len(curr_h), LBL_UNDEFINED, dtype=object)
+
+    inside = (curr_h < prev_h) & (curr_l > prev_l)
+    outside = (curr_h > prev_h) & (curr_l < prev_l)
+    directional = ~inside & ~outside
+    two_up = directional & (curr_h > prev_h)
+    two_down = directional & (curr_l < prev_l)
+    green = curr_c >= curr_o
+
+    labels[inside] = LBL_INSIDE
+    labels[outside] = LBL_OUTSIDE
+    labels[two_up & green] = LBL_2U_GREEN
+    labels[two_up & ~green] = LBL_2U_RED
+    labels[two_down & green] = LBL_2D_GREEN
+    labels[two_down & ~green] = LBL_2D_RED
+    return labels
+
+def classify_candles(candles, is_3m):
+    """STRAT labels for the previous and current candle of every row
+    of the candle matrix, in one struct-of-arrays pass."""
+    curr_labels = classify_strat(
+        candles[:, -2, H], candles[:, -2, L],
+        candles[:, -1, H], candles[:, -1, L],
+        candles[:, -1, O], candles[:, -1, C],
+    )
+    if is_3m:
+        # No previous pattern with only 2 candles
+        prev_labels = np.full(len(candles), LBL_NA_3M, dtype=object)
+    else:
+        prev_labels = classify_strat(
+            candles[:, -3, H], candles[:, -3, L],
+            candles[:, -2, H], candles[:, -2, L],
+            candles[:, -2, O], candles[:, -2, C],
+        )
+    return curr_labels, prev_labels
+
+def ftfc_dirs(closes, monthly_open, lower_open):
+    """Signed FTFC direction of each close vs the period opens
+    (+1 bullish, -1 bearish, 0 flat or unavailable)."""
+    with np.errstate(invalid="ignore"):
+        monthly_dir = np.where(np.isnan(monthly_open), 0, np.sign(closes - monthly_open)).astype(int)
+        lower_dir = np.where(np.isnan(lower_open), 0, np.sign(closes - lower_open)).astype(int)
+    return monthly_dir, lower_dir
 
 # =====================================================
-# FTFC CALCULATION (FIXED FOR MULTIINDEX)
+# FTFC CALCULATION (DERIVED FROM ONE DAILY DOWNLOAD)
 # =====================================================
-def calculate_ftfc(ticker, current_close, is_quarterly=False):
-    """Calculate FTFC with proper MultiIndex handling"""
+def ftfc_opens(daily_all, tickers, is_quarterly=False):
+    """
+    Current-period Opens for FTFC, derived from one batched daily
+    download: the monthly open is the first daily Open of the current
+    month, the weekly/quarterly open the first of the current ISO week
+    or calendar quarter. Returns two {ticker: open} dicts.
+    """
+    monthly_opens = {}
+    lower_opens = {}
+
+    for ticker in tickers:
+        # Validate up front instead of catching per-ticker exceptions:
+        # empty slices and missing columns are the normal failure modes
+        data = get_ticker_frame(daily_all, ticker)
+        if data.empty or "Open" not in data.columns:
+            continue
+        opens = data["Open"].dropna()
+        if opens.empty:
+            continue
+
+        last = opens.index[-1]
+
+        month = opens[opens.index >= last.replace(day=1)]
+        if not month.empty:
+            monthly_opens[ticker] = float(month.iloc[0])
+
+        if is_quarterly:
+            quarter_month = last.month - (last.month - 1) % 3
+            period_start = last.replace(month=quarter_month, day=1)
+        else:
+            period_start = (last - pd.Timedelta(days=last.weekday())).normalize()
+        period = opens[opens.index >= period_start]
+        if not period.empty:
+            lower_opens[ticker] = float(period.iloc[0])
+
+    return monthly_opens, lower_opens
+
+def ftfc_label(monthly_dir, lower_dir, is_quarterly=False):
+    """Render the kernel's FTFC directions as the display string"""
     ftfc_results = []
-    
-    # Monthly FTFC
+
+    if monthly_dir > 0:
+        ftfc_results.append("M: Bullish")
+    elif monthly_dir < 0:
+        ftfc_results.append("M: Bearish")
+
+    label = "Q" if is_quarterly else "W"
+    if lower_dir > 0:
+        ftfc_results.append(f"{label}: Bullish")
+    elif lower_dir < 0:
+        ftfc_results.append(f"{label}: Bearish")
+
+    return ", ".join(ftfc_results) if ftfc_results else "N/A"
+
+@st.cache_data
+def to_csv_bytes(df):
+    """CSV bytes for the download button, memoized per result set so
+    Streamlit reruns don't re-encode an unchanged frame. Serializes
+    through Arrow when pyarrow is available, pandas otherwise."""
     try:
-        monthly_data = yf.download(
-            ticker, 
-            period="6mo", 
-            interval="1mo", 
-            progress=False, 
-            auto_adjust=True
-        )
-        
-        if not monthly_data.empty and len(monthly_data) >= 1:
-            # Handle MultiIndex
-            if isinstance(monthly_data.columns, pd.MultiIndex):
-                monthly_open = float(monthly_data.iloc[-1][("Open", ticker)])
-            else:
-                monthly_open = float(monthly_data.iloc[-1]["Open"])
-            
-            if current_close > monthly_open:
-                ftfc_results.append("M: Bullish")
-            elif current_close < monthly_open:
-                ftfc_results.append("M: Bearish")
+        import io
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+
+        buf = io.BytesIO()
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+        return buf.getvalue()
     except Exception:
-        pass
-    
-    # Weekly or Quarterly FTFC
-    if is_quarterly:
-        try:
-            quarterly_data = yf.download(
-                ticker, 
-                period="1y",
-                interval="3mo", 
-                progress=False, 
-                auto_adjust=True
-            )
-            
-            if not quarterly_data.empty and len(quarterly_data) >= 1:
-                if isinstance(quarterly_data.columns, pd.MultiIndex):
-                    quarterly_open = float(quarterly_data.iloc[-1][("Open", ticker)])
-                else:
-                    quarterly_open = float(quarterly_data.iloc[-1]["Open"])
-                
-                if current_close > quarterly_open:
-                    ftfc_results.append("Q: Bullish")
-                elif current_close < quarterly_open:
-                    ftfc_results.append("Q: Bearish")
-        except Exception:
-            pass
-    else:
-        try:
-            weekly_data = yf.download(
-                ticker, 
-                period="1mo",
-                interval="1wk", 
-                progress=False, 
-                auto_adjust=True
-            )
-            
-            if not weekly_data.empty and len(weekly_data) >= 1:
-                if isinstance(weekly_data.columns, pd.MultiIndex):
-                    weekly_open = float(weekly_data.iloc[-1][("Open", ticker)])
-                else:
-                    weekly_open = float(weekly_data.iloc[-1]["Open"])
-                
-                if current_close > weekly_open:
-                    ftfc_results.append("W: Bullish")
-                elif current_close < weekly_open:
-                    ftfc_results.append("W: Bearish")
-        except Exception:
-            pass
-    
-    return ", ".join(ftfc_results) if ftfc_results else "N/A"
+        return df.to_csv(index=False).encode("utf-8")
 
 # =====================================================
 # UI
@@ -173,7 +421,7 @@ interval_map = {
     "3-Month": ("3mo", "max")
 }
 
-available_patterns = ["1 (Inside)", "3 (Outside)", "2U Red", "2U Green", "2D Red", "2D Green"]
+available_patterns = [LBL_INSIDE, LBL_OUTSIDE, LBL_2U_RED, LBL_2U_GREEN, LBL_2D_RED, LBL_2D_GREEN]
 
 st.subheader("STRAT Pattern Filters")
 col1, col2 = st.columns(2)
@@ -205,8 +453,6 @@ scan_button = st.button("🔍 Run Scanner", type="primary")
 # SCANNER (FIXED AND WORKING)
 # =====================================================
 if scan_button:
-    results = []
-    
     tickers_to_scan = TICKERS[:limit_tickers] if limit_tickers > 0 else TICKERS
     total = len(tickers_to_scan)
     
@@ -215,143 +461,167 @@ if scan_button:
     
     progress_bar = st.progress(0)
     status_text = st.empty()
-    
+    # Results render into this slot, above the summary metrics
+    results_placeholder = st.empty()
+
     # For 3M, we only need 2 candles. For others, we need 3
     min_candles = 2 if is_3m else 3
-    
-    for idx, ticker in enumerate(tickers_to_scan):
-        try:
-            progress = (idx + 1) / total
-            progress_bar.progress(min(progress, 0.99))
-            status_text.text(f"Scanning {ticker}... ({idx+1}/{total})")
-            
-            # Download data
-            data = yf.download(
-                ticker,
-                period=period,
-                interval=interval,
-                progress=False,
-                auto_adjust=True,
-            )
-            
-            if show_details and idx < 3:
-                st.write(f"**{ticker}:** {len(data)} candles, MultiIndex: {isinstance(data.columns, pd.MultiIndex)}")
-            
-            if data.empty or len(data) < min_candles:
-                continue
-            
-            # Get candles based on timeframe
-            if is_3m:
-                # 3M: Compare last 2 candles only
-                prev = data.iloc[-2]
-                curr = data.iloc[-1]
-                
-                # Calculate pattern (prev vs curr)
-                curr_candle = strat_type(prev, curr, ticker)
-                prev_candle = "N/A (3M)"  # No previous pattern with only 2 candles
-                
-                # Get current price
-                curr_close = get_val(curr, "Close", ticker)
-                curr_open = get_val(curr, "Open", ticker)
-                
-            else:
-                # Daily/Weekly/Monthly: Use 3 candles
-                prev_prev = data.iloc[-3]
-                prev = data.iloc[-2]
-                curr = data.iloc[-1]
-                
-                prev_candle = strat_type(prev_prev, prev, ticker)
-                curr_candle = strat_type(prev, curr, ticker)
-                
-                # Get current price
-                curr_close = get_val(curr, "Close", ticker)
-                curr_open = get_val(curr, "Open", ticker)
-            
-            # Skip if error
-            if "Error" in str(curr_candle):
-                continue
-            
-            # Check pattern filters
-            if is_3m:
-                pattern_match = (not curr_patterns or curr_candle in curr_patterns)
-            else:
-                pattern_match = (not prev_patterns or prev_candle in prev_patterns) and \
-                               (not curr_patterns or curr_candle in curr_patterns)
-            
-            if not pattern_match:
-                continue
-            
-            # Calculate FTFC
-            ftfc_str = calculate_ftfc(ticker, curr_close, is_quarterly=is_3m)
-            
-            # Apply FTFC filter
-            if "Any" not in ftfc_filter:
-                if "Both Bullish" in ftfc_filter:
-                    if not (("M: Bullish" in ftfc_str and "W: Bullish" in ftfc_str) or 
-                            ("M: Bullish" in ftfc_str and "Q: Bullish" in ftfc_str)):
-                        continue
-                elif "Both Bearish" in ftfc_filter:
-                    if not (("M: Bearish" in ftfc_str and "W: Bearish" in ftfc_str) or
-                            ("M: Bearish" in ftfc_str and "Q: Bearish" in ftfc_str)):
-                        continue
-                else:
-                    if not any(f in ftfc_str for f in ftfc_filter if f != "Any"):
-                        continue
-            
-            # Add result
-            results.append({
-                "Ticker": ticker,
-                "Previous Candle": prev_candle,
-                "Current Candle": curr_candle,
-                "Direction": "Up" if curr_close > curr_open else "Down",
-                "Close Price": round(curr_close, 2),
-                "FTFC": ftfc_str,
-            })
-            
-        except Exception as e:
-            if show_details:
-                st.error(f"Error with {ticker}: {e}")
-            continue
-    
+
+    # One batched download for every ticker instead of N round-trips
+    # (yfinance splits the list into concurrent multi-symbol requests)
+    status_text.text(f"Downloading {total} tickers...")
+    # STRAT/FTFC only compare bars within one series, so the
+    # dividend/split adjustment pass is pure overhead here
+    all_data = download_batch_cached(
+        tuple(tickers_to_scan),
+        period=period,
+        interval=interval,
+        auto_adjust=False,
+    )
+
+    # Classify candles for every ticker in one vectorized pass
+    status_text.text("Classifying candles...")
+    kept, candles = build_candle_matrix(all_data, tickers_to_scan, min_candles)
+
+    if show_details:
+        st.write(f"**{len(kept)}** of {total} tickers have {min_candles}+ clean candles")
+
+    curr_labels, prev_labels = classify_candles(candles, is_3m)
+
+    # Apply the pattern filters BEFORE any FTFC work, so the daily
+    # download and open extraction only cover tickers still in play.
+    # Undefined candles are never selectable, so they only pass when
+    # explicitly present in the filter — even with an empty filter list
+    prev_set = frozenset(prev_patterns)
+    curr_set = frozenset(curr_patterns)
+    ftfc_set = frozenset(ftfc_filter)
+    if is_3m:
+        pattern_mask = np.array(
+            [
+                c in curr_set if curr_set else c is not LBL_UNDEFINED
+                for c in curr_labels
+            ],
+            dtype=bool,
+        )
+    else:
+        pattern_mask = np.array(
+            [
+                (not prev_set or p in prev_set)
+                and (c in curr_set if curr_set else c is not LBL_UNDEFINED)
+                for p, c in zip(prev_labels, curr_labels)
+            ],
+            dtype=bool,
+        )
+
+    matched = [t for t, m in zip(kept, pattern_mask) if m]
+    curr_labels = curr_labels[pattern_mask]
+    prev_labels = prev_labels[pattern_mask]
+    curr_opens = candles[pattern_mask, -1, O]
+    curr_closes = candles[pattern_mask, -1, C]
+
+    # One batched daily download covers every FTFC timeframe for the
+    # matched tickers: monthly, weekly and quarterly opens all fall
+    # out of daily bars
+    monthly_dirs = lower_dirs = np.empty(0, dtype=int)
+    if matched:
+        status_text.text(f"Downloading daily data for FTFC ({len(matched)} matches)...")
+        ftfc_daily = download_batch_cached(
+            tuple(matched),
+            period="6mo",
+            interval="1d",
+            auto_adjust=False,
+        )
+        monthly_opens, lower_opens = ftfc_opens(ftfc_daily, matched, is_quarterly=is_3m)
+
+        # Align the FTFC opens with the matched tickers (NaN = unavailable)
+        monthly_open_arr = np.array([monthly_opens.get(t, np.nan) for t in matched], dtype=np.float32)
+        lower_open_arr = np.array([lower_opens.get(t, np.nan) for t in matched], dtype=np.float32)
+        monthly_dirs, lower_dirs = ftfc_dirs(curr_closes, monthly_open_arr, lower_open_arr)
+
+    # Apply the FTFC filter as one boolean mask over the direction
+    # arrays instead of per-row substring checks in the loop
+    if matched and "Any" not in ftfc_set:
+        if "Both Bullish" in ftfc_set:
+            ftfc_mask = (monthly_dirs > 0) & (lower_dirs > 0)
+        elif "Both Bearish" in ftfc_set:
+            ftfc_mask = (monthly_dirs < 0) & (lower_dirs < 0)
+        else:
+            lower_prefix = "Q" if is_3m else "W"
+            ftfc_mask = np.zeros(len(matched), dtype=bool)
+            for f in ftfc_set:
+                if f == "M: Bullish":
+                    ftfc_mask |= monthly_dirs > 0
+                elif f == "M: Bearish":
+                    ftfc_mask |= monthly_dirs < 0
+                elif f == f"{lower_prefix}: Bullish":
+                    ftfc_mask |= lower_dirs > 0
+                elif f == f"{lower_prefix}: Bearish":
+                    ftfc_mask |= lower_dirs < 0
+
+        matched = [t for t, m in zip(matched, ftfc_mask) if m]
+        prev_labels = prev_labels[ftfc_mask]
+        curr_labels = curr_labels[ftfc_mask]
+        curr_opens = curr_opens[ftfc_mask]
+        curr_closes = curr_closes[ftfc_mask]
+        monthly_dirs = monthly_dirs[ftfc_mask]
+        lower_dirs = lower_dirs[ftfc_mask]
+
+    # Columnar assembly: build the result frame straight from the
+    # filtered arrays — no per-row dicts, appends or round() calls
+    status_text.text(f"Assembling {len(matched)} results...")
+    progress_bar.progress(0.99)
+
+    ftfc_strs = [ftfc_label(m, l, is_quarterly=is_3m) for m, l in zip(monthly_dirs, lower_dirs)]
+    df = pd.DataFrame({
+        "Ticker": matched,
+        "Previous Candle": prev_labels,
+        "Current Candle": curr_labels,
+        "Direction": np.where(curr_closes > curr_opens, "Up", "Down"),
+        "Close Price": np.round(curr_closes, 2),
+        "FTFC": ftfc_strs,
+    })
+
+    # Arrow-backed strings keep the label columns in contiguous UTF-8
+    # buffers, so the styling str.contains masks run in Arrow's C++
+    # kernels instead of Python regex over boxed objects
+    try:
+        for col in ("Previous Candle", "Current Candle", "FTFC"):
+            df[col] = df[col].astype("string[pyarrow]")
+    except (ImportError, TypeError):
+        pass
+
     progress_bar.empty()
     status_text.empty()
-    
+
     # Display results
-    if results:
-        df = pd.DataFrame(results)
-        
-        # Color coding
-        def color_ftfc(val):
-            if "Bullish" in val:
-                return "color: #00aa00; font-weight: bold"
-            elif "Bearish" in val:
-                return "color: #cc0000; font-weight: bold"
-            return ""
-        
+    if not df.empty:
+        # Color the FTFC column with one precomputed style frame
+        # instead of a per-cell Python callback; Bullish wins when a
+        # row mentions both, matching the old first-match behavior
+        styles = pd.DataFrame("", index=df.index, columns=df.columns)
+        styles.loc[df["FTFC"].str.contains("Bearish", regex=False), "FTFC"] = "color: #cc0000; font-weight: bold"
+        styles.loc[df["FTFC"].str.contains("Bullish", regex=False), "FTFC"] = "color: #00aa00; font-weight: bold"
+
         st.success(f"🎯 Found **{len(df)}** matching tickers out of {total} scanned | Timeframe: {timeframe}")
-        
-        csv = df.to_csv(index=False).encode('utf-8')
+
+        csv = to_csv_bytes(df)
         st.download_button("📥 Download CSV", csv, f"strat_{timeframe.lower().replace('-', '_')}_results.csv", "text/csv")
-        
-        st.dataframe(
-            df.style.applymap(color_ftfc, subset=['FTFC']),
+
+        results_placeholder.dataframe(
+            df.style.apply(lambda _: styles, axis=None),
             use_container_width=True,
             hide_index=True
         )
         
-        # Summary
+        # Summary — tallies come straight off the signed direction
+        # arrays (aligned with df), not substring scans of the
+        # rendered FTFC column
         st.subheader("Summary")
-        if timeframe == "3-Month":
-            c1, c2, c3, c4 = st.columns(4)
-            c1.metric("Monthly Bullish", df['FTFC'].str.contains('M: Bullish').sum())
-            c2.metric("Monthly Bearish", df['FTFC'].str.contains('M: Bearish').sum())
-            c3.metric("Quarterly Bullish", df['FTFC'].str.contains('Q: Bullish').sum())
-            c4.metric("Quarterly Bearish", df['FTFC'].str.contains('Q: Bearish').sum())
-        else:
-            c1, c2, c3, c4 = st.columns(4)
-            c1.metric("Monthly Bullish", df['FTFC'].str.contains('M: Bullish').sum())
-            c2.metric("Monthly Bearish", df['FTFC'].str.contains('M: Bearish').sum())
-            c3.metric("Weekly Bullish", df['FTFC'].str.contains('W: Bullish').sum())
-            c4.metric("Weekly Bearish", df['FTFC'].str.contains('W: Bearish').sum())
+        lower_name = "Quarterly" if is_3m else "Weekly"
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Monthly Bullish", int((monthly_dirs > 0).sum()))
+        c2.metric("Monthly Bearish", int((monthly_dirs < 0).sum()))
+        c3.metric(f"{lower_name} Bullish", int((lower_dirs > 0).sum()))
+        c4.metric(f"{lower_name} Bearish", int((lower_dirs < 0).sum()))
     else:
         st.warning("No tickers matched. Try relaxing filters or check 'Show Processing Details' to debug.")